@@ -2,20 +2,210 @@ import gradio as gr
 import json
 import time
 import random
+import asyncio
+import base64
+import copy
+import sys
+from collections import deque
+from functools import lru_cache
+
+import httpx
 from datetime import datetime
 import os
 import uuid
 import requests
+from requests.adapters import HTTPAdapter
 from requests.exceptions import ConnectionError, RequestException
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 from supabase import create_client, Client
 import threading
-from ollama import chat
+from ollama import chat, generate, AsyncClient
 from pydantic import BaseModel
 
+try:
+    import orjson  # C-extension JSON: much faster on large nested payloads
+except ImportError:
+    orjson = None
+
+try:
+    import json_repair  # Tolerant parser to salvage malformed LLM JSON
+except ImportError:
+    json_repair = None
+
 # Load environment variables
 load_dotenv()
 
+# Static system instructions, kept byte-identical across calls so Ollama's
+# prompt cache can reuse the prefill KV cache instead of recomputing it.
+# Never interpolate mutable data (timestamps, counters) into these strings.
+SYSTEM_INSTRUCTIONS = (
+    "You are a child trauma assessment specialist supporting parents and "
+    "caregivers of children affected by war and conflict. Respond with empathy, "
+    "use professional mental health vocabulary, adapt to the family's language "
+    "(Arabic, Ukrainian or English), and gently gather clinically relevant "
+    "observations about the child's behavior, sleep, mood and social patterns."
+)
+
+# Cultural-context templates and a flat keyword -> context map built once at
+# import, so matching a location is a single pass instead of three scans
+_CTX_CONFLICT = "Assessment conducted considering ongoing conflict exposure and displacement trauma"
+_CTX_WAR = "Assessment considering war-related trauma and displacement from conflict zones"
+_CTX_REFUGEE = "Assessment considering refugee experience and cultural adaptation challenges"
+
+_LOC_MAP = (
+    {kw: _CTX_CONFLICT for kw in ('gaza', 'palestine', 'west bank')}
+    | {kw: _CTX_WAR for kw in ('ukraine', 'kyiv', 'kharkiv', 'mariupol')}
+    | {kw: _CTX_REFUGEE for kw in ('syria', 'lebanon', 'jordan')}
+)
+
+_IMAGE_EXTS = ('.jpg', '.jpeg', '.png', '.gif', '.bmp')
+
+# Child-info banner shown after onboarding; the static tab HTML only renders
+# once at Blocks construction, but this one is rebuilt per submission
+_CHILD_DISPLAY_TMPL = (
+    '<div class="child-info-display">'
+    '<strong>👤 Assessment for:</strong> {name}, {age} years old ({gender}) • 📍 {location}'
+    '</div>'
+)
+
+# Pristine media-attachments shape, cloned whenever a session (re)starts
+_FRESH_MEDIA = {"drawings": [], "audio_recordings": [], "photos": []}
+
+def _fresh_copy(template):
+    """Deep-copy a plain-data template (orjson round-trip beats deepcopy)"""
+    if orjson is not None:
+        return orjson.loads(orjson.dumps(template))
+    return copy.deepcopy(template)
+
+# 64 KB write buffer for report saves (default is 8 KB, which means many more
+# write() syscalls for a multi-KB report)
+_SAVE_BUFFER_SIZE = 65536
+
+# Past this many media attachments + observation chunks, stream json.dump to
+# disk through a 1 MiB buffer instead of building one in-memory blob, so peak
+# memory stays bounded for media-laden sessions
+_STREAM_SAVE_THRESHOLD = 500
+_STREAM_BUFFER_SIZE = 1 << 20
+
+# Keep the model resident between calls so users never pay the multi-GB
+# weight-load cost mid-session (OLLAMA_KEEP_ALIVE=2h on the server works too)
+MODEL_KEEP_ALIVE = "2h"
+
+MODEL_NAME = 'llm_hub/child_trauma_gemma'
+
+# Optional llama.cpp backend: set LLAMA_SERVER_URL (e.g. http://localhost:8080)
+# to route inference to llama-server's OpenAI-compatible endpoint instead of
+# Ollama. Serve the Gemma model quantized to Q4_K_M and start the server with
+# `-np 4 --cont-batching` so concurrent users share the batch.
+LLAMA_SERVER_URL = (os.getenv("LLAMA_SERVER_URL") or "").rstrip("/")
+
+# Conversation-memory bounds: once the running transcript exceeds the token
+# threshold, older turns are compressed into a single summary system note
+SUMMARY_TOKEN_THRESHOLD = 2000
+RECENT_TURNS_KEPT = 6
+
+REPORT_INSTRUCTIONS = """Based on our conversation, generate a comprehensive trauma risk assessment report for the child described above.
+
+Include:
+- Parent observations summary from our conversation
+- AI analysis of trauma indicators
+- Severity score (1-10 scale)
+- List of risk indicators identified
+- Cultural context considering the child's location and circumstances
+
+Consider the conversation history and any cultural factors relevant to the child's location."""
+
+# Markdown skeleton of the assessment report, parsed once at import and filled
+# per report via format_map with a single datetime.now() snapshot
+REPORT_TEMPLATE = """# 🔍 COMPREHENSIVE TRAUMA ASSESSMENT REPORT
+
+**Generated:** {now_human}  
+**Assessment ID:** {assessment_id}  
+**Confidentiality Level:** Protected Health Information
+**Platform:** Child Trauma Assessment AI
+
+---
+
+## 👤 CHILD INFORMATION
+
+**Name:** {name}  
+**Age:** {age} years old  
+**Gender:** {gender}  
+**Location:** {location}  
+**Assessment Date:** {now_date}
+
+---
+
+## 👥 PARENT OBSERVATIONS
+
+{parent_observations}
+
+**Session Details:**
+- **Duration:** {message_count} message exchanges
+- **Media Provided:** {drawings_count} drawings, {photos_count} photographs
+
+---
+
+## 🧠 AI ANALYSIS
+
+{ai_analysis}
+
+**Behavioral Patterns Identified:**
+{risk_indicators_md}
+
+---
+
+## ⚠️ SEVERITY ASSESSMENT
+
+**Severity Score:** {severity}/10  
+**Risk Level:** {risk_level}  
+**Clinical Priority:** {clinical_priority}
+
+---
+
+## 🌍 CULTURAL CONTEXT
+
+{cultural_context}
+
+This assessment considers the cultural and environmental factors specific to {location}, including region-specific trauma expressions, family dynamics, and community support systems.
+
+---
+
+## 📋 CLINICAL RECOMMENDATIONS
+
+**Immediate Actions:**
+1. Schedule comprehensive evaluation with licensed child trauma specialist
+2. Ensure stable, predictable environment for {name}
+3. Implement safety planning and crisis contact protocols
+
+**Therapeutic Interventions:**
+1. Begin trauma-focused cognitive behavioral therapy (TF-CBT)
+2. Consider family therapy to strengthen support systems
+3. Monitor sleep, appetite, and behavioral patterns daily
+
+**Cultural Considerations:**
+1. Engage culturally competent mental health services
+2. Incorporate traditional coping mechanisms where appropriate
+3. Consider community-based support resources
+
+**Follow-up:**
+- Initial professional evaluation within 1-2 weeks
+- Regular monitoring and assessment as recommended by treating clinician
+
+---
+
+## ⚖️ IMPORTANT DISCLAIMERS
+
+- **Preliminary Screening Tool:** This AI-generated assessment is for screening purposes only and does NOT constitute a clinical diagnosis
+- **Professional Validation Required:** All findings must be validated by licensed mental health professionals
+- **Emergency Protocol:** For immediate safety concerns, contact emergency services immediately
+- **Clinical Judgment:** AI analysis should supplement, not replace, professional clinical assessment
+
+**Report Generated:** {now_iso}  
+**Next Review Recommended:** {now_date} (2 weeks)
+"""
+
 # Pydantic model for structured report generation
 class RiskAssessment(BaseModel):
     parent_observations: str
@@ -24,6 +214,9 @@ class RiskAssessment(BaseModel):
     risk_indicators: list[str]
     cultural_context: str
 
+# JSON schema for structured output, computed once instead of per report
+RISK_SCHEMA = RiskAssessment.model_json_schema()
+
 class EnhancedTraumaAssessmentApp:
     def __init__(self):
         self.report_data = {
@@ -40,20 +233,50 @@ class EnhancedTraumaAssessmentApp:
                 "risk_indicators": [],
                 "cultural_context": ""
             },
-            "media_attachments": {
-                "drawings": [],
-                "audio_recordings": [],
-                "photos": []
-            },
+            "media_attachments": _fresh_copy(_FRESH_MEDIA),
             "mobile_app_id": str(uuid.uuid4()),
-            "session_start": datetime.now().isoformat(),
-            "conversation_history": []
+            "session_start": datetime.now().isoformat()
         }
+        self._message_count = 0  # Exchanges this session; the raw transcript stays in Gradio
+        self._observation_chunks = []  # Raw parent messages, joined once at report time
+        self._report_dirty = True  # report_data changed since the last serialization
+        self._json_cache = None  # Cached serialized report_data bytes
+        self._feedback_buffer = deque(maxlen=256)  # Like/dislike events awaiting flush
+        self._feedback_last_flush = time.monotonic()
         self.is_onboarded = False
         self.submitted_report_id = None
         self.polling_active = False
+        self._response_channel = None
+        self._monitor_timer = None
+        self._cancel = threading.Event()  # Cancels the polling fallback promptly
+        self._response_event = threading.Event()  # Set when a specialist response lands
         self.ollama_conversation = []  # Track conversation for the model
-        
+        self.summary = ""  # Rolling summary of turns dropped from the transcript
+
+        # Fixed prompt prefix: built once and reused verbatim on every call so
+        # the Ollama prompt cache hits and prefill stays O(new turn)
+        self.system_message = {"role": "system", "content": SYSTEM_INSTRUCTIONS}
+        self.child_info_message = None  # Filled in once at onboarding
+
+        # Async Ollama client so chat calls don't block the Gradio event loop
+        # (set OLLAMA_NUM_PARALLEL on the server to serve concurrent users)
+        self.aclient = AsyncClient()
+        # HTTP client for the optional llama-server backend
+        self._llama_client = httpx.AsyncClient(timeout=120) if LLAMA_SERVER_URL else None
+
+        # Shared HTTP session for all synchronous calls (Care Bridge pushes,
+        # llama-server summarization): pooled keep-alive connections avoid a
+        # fresh DNS + TCP + TLS handshake per request, with retry + backoff
+        # for transient upstream errors
+        self._http = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=16,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+        )
+        self._http.mount("https://", adapter)
+        self._http.mount("http://", adapter)
+
         # Initialize Supabase client
         self.supabase_url = os.getenv("NEXT_PUBLIC_SUPABASE_URL")
         self.supabase_key = os.getenv("NEXT_PUBLIC_SUPABASE_ANON_KEY")
@@ -63,7 +286,110 @@ class EnhancedTraumaAssessmentApp:
         else:
             self.supabase = None
             print("⚠️ Supabase credentials not found in .env file")
-        
+
+        # Warm up the model in the background so the first real user
+        # interaction doesn't pay the cold-start load cost
+        threading.Thread(target=self._warm_up_model, daemon=True).start()
+
+    def _warm_up_model(self):
+        """Load the model into memory ahead of the first user request"""
+        if LLAMA_SERVER_URL:
+            return  # llama-server loads its model at startup
+        try:
+            generate(model=MODEL_NAME, prompt='', keep_alive=MODEL_KEEP_ALIVE)
+            print("✅ Ollama model preloaded")
+        except Exception as e:
+            print(f"⚠️ Ollama model warm-up failed: {e}")
+
+    @staticmethod
+    def _to_openai_messages(messages):
+        """Convert Ollama-style messages (with 'images' paths) to OpenAI format"""
+        converted = []
+        for msg in messages:
+            if msg.get("images"):
+                content = [{"type": "text", "text": msg["content"]}]
+                for path in msg["images"]:
+                    with open(path, "rb") as f:
+                        encoded = base64.b64encode(f.read()).decode()
+                    content.append({
+                        "type": "image_url",
+                        "image_url": {"url": f"data:image/jpeg;base64,{encoded}"}
+                    })
+                converted.append({"role": msg["role"], "content": content})
+            else:
+                converted.append({"role": msg["role"], "content": msg["content"]})
+        return converted
+
+    async def _chat_stream(self, messages):
+        """Stream response-text chunks from the configured inference backend"""
+        if LLAMA_SERVER_URL:
+            payload = {
+                "model": MODEL_NAME,
+                "messages": self._to_openai_messages(messages),
+                "stream": True
+            }
+            async with self._llama_client.stream(
+                "POST", f"{LLAMA_SERVER_URL}/v1/chat/completions", json=payload
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.startswith("data: "):
+                        continue
+                    data = line[len("data: "):]
+                    if data == "[DONE]":
+                        break
+                    delta = json.loads(data)["choices"][0]["delta"]
+                    if delta.get("content"):
+                        yield delta["content"]
+        else:
+            stream = await self.aclient.chat(
+                model=MODEL_NAME,
+                messages=messages,
+                stream=True,
+                keep_alive=MODEL_KEEP_ALIVE
+            )
+            async for chunk in stream:
+                yield chunk['message']['content']
+
+    async def _chat_structured(self, messages, schema):
+        """Run a structured-output chat call and return the raw JSON content"""
+        if LLAMA_SERVER_URL:
+            payload = {
+                "model": MODEL_NAME,
+                "messages": self._to_openai_messages(messages),
+                "temperature": 0,
+                "response_format": {
+                    "type": "json_schema",
+                    "json_schema": {"name": "risk_assessment", "schema": schema}
+                }
+            }
+            response = await self._llama_client.post(
+                f"{LLAMA_SERVER_URL}/v1/chat/completions", json=payload
+            )
+            response.raise_for_status()
+            return response.json()["choices"][0]["message"]["content"]
+        response = await self.aclient.chat(
+            model=MODEL_NAME,
+            messages=messages,
+            format=schema,
+            options={'temperature': 0},
+            keep_alive=MODEL_KEEP_ALIVE
+        )
+        return response.message.content
+
+    def _chat_sync(self, messages):
+        """Blocking chat call for background work (e.g. summarization)"""
+        if LLAMA_SERVER_URL:
+            response = self._http.post(
+                f"{LLAMA_SERVER_URL}/v1/chat/completions",
+                json={"model": MODEL_NAME, "messages": self._to_openai_messages(messages)},
+                timeout=120
+            )
+            response.raise_for_status()
+            return response.json()["choices"][0]["message"]["content"]
+        response = chat(model=MODEL_NAME, messages=messages, keep_alive=MODEL_KEEP_ALIVE)
+        return response.message.content
+
     def complete_onboarding(self, child_name, child_age, child_gender, child_location):
         """Complete the onboarding process and store child info"""
         if not all([child_name, child_age, child_gender, child_location]):
@@ -76,28 +402,37 @@ class EnhancedTraumaAssessmentApp:
             "location": child_location
         }
         self.is_onboarded = True
-        
+
+        # Static child bio system message: appended to the cached prefix once,
+        # then never modified for the rest of the session
+        self.child_info_message = {
+            "role": "system",
+            "content": (
+                f"The child being assessed is {child_name}, a {int(child_age)}-year-old "
+                f"{child_gender.lower()} currently located in {child_location}."
+            )
+        }
+
         # Generate cultural context based on location
         self.report_data["assessment_data"]["cultural_context"] = self.generate_cultural_context(child_location)
-        
+        self._report_dirty = True
+
         return True, f"Welcome! I'm ready to help you with {child_name}'s assessment."
     
-    def generate_cultural_context(self, location):
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def generate_cultural_context(location):
         """Generate appropriate cultural context based on location"""
         location_lower = location.lower()
-        if any(keyword in location_lower for keyword in ['gaza', 'palestine', 'west bank']):
-            return "Assessment conducted considering ongoing conflict exposure and displacement trauma"
-        elif any(keyword in location_lower for keyword in ['ukraine', 'kyiv', 'kharkiv', 'mariupol']):
-            return "Assessment considering war-related trauma and displacement from conflict zones"
-        elif any(keyword in location_lower for keyword in ['syria', 'lebanon', 'jordan']):
-            return "Assessment considering refugee experience and cultural adaptation challenges"
-        else:
-            return f"Assessment conducted with consideration for local cultural context in {location}"
+        for keyword, context in _LOC_MAP.items():
+            if keyword in location_lower:
+                return context
+        return f"Assessment conducted with consideration for local cultural context in {location}"
     
     def add_message(self, history, message):
         """Add user message with multimodal support"""
         if not self.is_onboarded:
-            return history, gr.MultimodalTextbox(value=None, interactive=False)
+            return history, gr.update(value=None, interactive=False)
         
         # Handle file uploads
         if message.get("files"):
@@ -116,6 +451,7 @@ class EnhancedTraumaAssessmentApp:
                         "path": file,
                         "timestamp": datetime.now().isoformat()
                     })
+                    self._report_dirty = True
                     print(f"Image file detected: {file}")
         
         # Handle text message
@@ -130,23 +466,53 @@ class EnhancedTraumaAssessmentApp:
                 "content": message["text"]
             })
             # Add to parent observations
-            current_obs = self.report_data["assessment_data"]["parent_observations"]
-            self.report_data["assessment_data"]["parent_observations"] = (
-                current_obs + " " + message["text"] if current_obs else message["text"]
-            )
+            self._observation_chunks.append(message["text"])
         
-        # Store conversation history
-        self.report_data["conversation_history"] = history
-        return history, gr.MultimodalTextbox(value=None, interactive=False)
-    
+        # Compress older turns once the transcript grows past the token budget
+        if self._approx_tokens(self.ollama_conversation) > SUMMARY_TOKEN_THRESHOLD:
+            self._summarize_older_turns()
+
+        self._message_count += 1
+        return history, gr.update(value=None, interactive=False)
+
+    @staticmethod
+    def _approx_tokens(messages):
+        """Cheap token estimate for the transcript (~1.3 tokens per word)"""
+        return int(len(" ".join(str(m["content"]) for m in messages).split()) * 1.3)
+
+    def _summarize_older_turns(self):
+        """Fold older conversation turns into a single summary system note.
+
+        Keeps the most recent turns verbatim so prompt-eval cost stays bounded
+        no matter how long the session runs.
+        """
+        if len(self.ollama_conversation) <= RECENT_TURNS_KEPT:
+            return
+
+        old_turns = self.ollama_conversation[:-RECENT_TURNS_KEPT]
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in old_turns)
+
+        try:
+            self.summary = self._chat_sync([{
+                "role": "user",
+                "content": f"Summarize prior conversation preserving clinical observations: {transcript}"
+            }])
+            self.ollama_conversation = [
+                {"role": "system", "content": f"Prior conversation summary: {self.summary}"},
+                *self.ollama_conversation[-RECENT_TURNS_KEPT:]
+            ]
+        except Exception as e:
+            # Keep the raw turns rather than lose clinical context
+            print(f"Ollama summarization error: {e}")
+
     def classify_file_type(self, file_path):
         """Classify uploaded file type"""
-        if file_path.lower().endswith(('.jpg', '.jpeg', '.png', '.gif', '.bmp')):
+        if file_path.lower().endswith(_IMAGE_EXTS):
             return "image"
         else:
             return "other"
     
-    def bot_response(self, history):
+    async def bot_response(self, history):
         """Generate bot response using Ollama model"""
         if not history or not self.is_onboarded:
             return
@@ -168,86 +534,78 @@ class EnhancedTraumaAssessmentApp:
         
         # Prepare message for Ollama
         if has_image and image_path:
-            # Handle image input
-            try:
-                response = chat(
-                    model='llm_hub/child_trauma_gemma',
-                    messages=[{
-                        'role': 'user',
-                        'content': f'I am sharing an image related to my child {self.report_data["child_info"]["name"]}\'s situation. Please analyze this image in the context of trauma assessment and respond empathetically.',
-                        'images': [image_path],
-                    }]
-                )
-                response_text = response.message.content
-            except Exception as e:
-                response_text = f"I can see you've shared an image. Thank you for providing this visual information about {self.report_data['child_info']['name']}. Visual expressions can tell us a lot about how children process their experiences. Could you tell me more about when this was created or what you'd like me to know about it?"
-                print(f"Ollama image error: {e}")
+            messages = [{
+                'role': 'user',
+                'content': f'I am sharing an image related to my child {self.report_data["child_info"]["name"]}\'s situation. Please analyze this image in the context of trauma assessment and respond empathetically.',
+                'images': [image_path],
+            }]
         else:
-            # Handle text conversation
-            try:
-                response = chat(
-                    model='llm_hub/child_trauma_gemma',
-                    messages=self.ollama_conversation
-                )
-                response_text = response.message.content
-            except Exception as e:
-                response_text = f"Thank you for sharing that with me. I understand this is a difficult time for you and {self.report_data['child_info']['name']}. Could you tell me more about what you're observing?"
-                print(f"Ollama text error: {e}")
-        
-        # Add assistant response to conversation history
-        self.ollama_conversation.append({
-            "role": "assistant", 
-            "content": response_text
-        })
-        
+            messages = [self.system_message, self.child_info_message, *self.ollama_conversation]
+
         # Start bot response
         history.append({"role": "assistant", "content": ""})
-        
-        # Stream the response
-        for character in response_text:
-            history[-1]["content"] += character
-            time.sleep(0.02)
+
+        # Stream tokens from the model as they are generated, accumulating
+        # chunks in a list so we never re-concatenate strings quadratically
+        parts = []
+        try:
+            async for chunk in self._chat_stream(messages):
+                parts.append(chunk)
+                history[-1]["content"] = "".join(parts)
+                yield history
+        except Exception as e:
+            print(f"Inference {'image' if has_image else 'text'} error: {e}")
+            if has_image:
+                parts = [f"I can see you've shared an image. Thank you for providing this visual information about {self.report_data['child_info']['name']}. Visual expressions can tell us a lot about how children process their experiences. Could you tell me more about when this was created or what you'd like me to know about it?"]
+            else:
+                parts = [f"Thank you for sharing that with me. I understand this is a difficult time for you and {self.report_data['child_info']['name']}. Could you tell me more about what you're observing?"]
+            history[-1]["content"] = "".join(parts)
             yield history
+
+        # Add assistant response to conversation history
+        self.ollama_conversation.append({
+            "role": "assistant",
+            "content": "".join(parts)
+        })
     
-    def generate_comprehensive_report(self, progress_callback=None):
+    async def generate_comprehensive_report(self, skip_ai_reassessment=False, progress=gr.Progress()):
         """Generate comprehensive assessment report using Ollama structured output"""
         if not self.is_onboarded:
             return "Please complete the initial assessment form first."
-        
+
         if not self.ollama_conversation:
             return "Please have a conversation first before generating a report."
-        
-        if progress_callback:
-            progress_callback("🤖 Analyzing conversation with AI...")
-        
-        try:
-            # Generate structured assessment using Ollama
-            assessment_prompt = f"""Based on our conversation about {self.report_data['child_info']['name']}, a {self.report_data['child_info']['age']}-year-old {self.report_data['child_info']['gender']} from {self.report_data['child_info']['location']}, generate a comprehensive trauma risk assessment report. 
 
-Include:
-- Parent observations summary from our conversation
-- AI analysis of trauma indicators
-- Severity score (1-10 scale)
-- List of risk indicators identified
-- Cultural context considering the child's location and circumstances
+        # Skip the structured LLM pass when explicitly requested or when the
+        # session is too short for the model to add anything over the notes
+        if skip_ai_reassessment or len(self.ollama_conversation) < 3:
+            progress(0.9, desc="📋 Formatting report from existing notes...")
+            self.report_data["assessment_data"]["parent_observations"] = " ".join(self._observation_chunks)
+            self._report_dirty = True
+            return self._format_report()
 
-Consider the conversation history and any cultural factors relevant to {self.report_data['child_info']['location']}."""
+        progress(0.1, desc="🤖 Analyzing conversation with AI...")
 
-            if progress_callback:
-                progress_callback("🧠 AI is generating structured assessment...")
+        try:
+            progress(0.3, desc="🧠 AI is generating structured assessment...")
 
-            response = chat(
-                model='llm_hub/child_trauma_gemma',
-                messages=[{'role': 'user', 'content': assessment_prompt}],
-                format=RiskAssessment.model_json_schema(),
-                options={'temperature': 0}
+            # Reuse the cached system prefix; only the report instruction is new
+            content = await self._chat_structured(
+                [
+                    self.system_message,
+                    self.child_info_message,
+                    *self.ollama_conversation,
+                    {'role': 'user', 'content': REPORT_INSTRUCTIONS}
+                ],
+                RISK_SCHEMA
             )
-            
-            if progress_callback:
-                progress_callback("📊 Processing assessment data...")
-            
-            # Parse structured response
-            assessment = RiskAssessment.model_validate_json(response.message.content)
+
+            progress(0.7, desc="📊 Processing assessment data...")
+
+            # Parse structured response, repairing malformed JSON if needed
+            assessment = self._parse_assessment(content)
+            if assessment is None:
+                raise ValueError("structured output could not be parsed")
             
             # Update report data with AI-generated assessment
             self.report_data["assessment_data"]["parent_observations"] = assessment.parent_observations
@@ -255,119 +613,101 @@ Consider the conversation history and any cultural factors relevant to {self.rep
             self.report_data["assessment_data"]["severity_score"] = assessment.severity_score
             self.report_data["assessment_data"]["risk_indicators"] = assessment.risk_indicators
             self.report_data["assessment_data"]["cultural_context"] = assessment.cultural_context
-            
-            if progress_callback:
-                progress_callback("📋 Formatting final report...")
-            
+            self._report_dirty = True
+
+            progress(0.9, desc="📋 Formatting final report...")
+
         except Exception as e:
-            print(f"Ollama structured output error: {e}")
-            if progress_callback:
-                progress_callback("⚠️ Using fallback assessment...")
-            # Fallback to basic assessment
+            print(f"Structured output error: {e}")
+            progress(0.8, desc="⚠️ Using fallback assessment...")
+            # Fallback to basic assessment from the raw observations
+            self.report_data["assessment_data"]["parent_observations"] = " ".join(self._observation_chunks)
             self.report_data["assessment_data"]["severity_score"] = 6
             self.report_data["assessment_data"]["risk_indicators"] = ["sleep disturbances", "behavioral changes", "anxiety"]
-        
-        # Generate formatted report
-        child_info = self.report_data["child_info"]
-        assessment_data = self.report_data["assessment_data"]
-        media_attachments = self.report_data["media_attachments"]
-        severity = assessment_data["severity_score"]
-        risk_indicators = assessment_data["risk_indicators"]
-        
-        return f"""# 🔍 COMPREHENSIVE TRAUMA ASSESSMENT REPORT
-
-**Generated:** {datetime.now().strftime("%B %d, %Y at %H:%M")}  
-**Assessment ID:** {self.report_data["mobile_app_id"][:8]}  
-**Confidentiality Level:** Protected Health Information
-**Platform:** Child Trauma Assessment AI
-
----
-
-## 👤 CHILD INFORMATION
-
-**Name:** {child_info["name"]}  
-**Age:** {child_info["age"]} years old  
-**Gender:** {child_info["gender"].title()}  
-**Location:** {child_info["location"]}  
-**Assessment Date:** {datetime.now().strftime("%B %d, %Y")}
-
----
-
-## 👥 PARENT OBSERVATIONS
-
-{assessment_data["parent_observations"]}
-
-**Session Details:**
-- **Duration:** {len(self.report_data["conversation_history"])} message exchanges
-- **Media Provided:** {len(media_attachments["drawings"])} drawings, {len(media_attachments["photos"])} photographs
-
----
-
-## 🧠 AI ANALYSIS
-
-{assessment_data["ai_analysis"]}
-
-**Behavioral Patterns Identified:**
-{chr(10).join([f"• {indicator}" for indicator in risk_indicators])}
+            self._report_dirty = True
 
----
+        return self._format_report()
 
-## ⚠️ SEVERITY ASSESSMENT
+    def _serialize_report_data(self):
+        """Serialize report_data, reusing the cached bytes when unchanged.
 
-**Severity Score:** {severity}/10  
-**Risk Level:** {"🟡 Moderate Risk" if severity < 7 else "🔴 High Risk - Urgent Intervention Recommended"}  
-**Clinical Priority:** {"Standard referral appropriate" if severity < 7 else "Expedited professional evaluation needed"}
-
----
-
-## 🌍 CULTURAL CONTEXT
-
-{assessment_data["cultural_context"]}
-
-This assessment considers the cultural and environmental factors specific to {child_info["location"]}, including region-specific trauma expressions, family dynamics, and community support systems.
-
----
-
-## 📋 CLINICAL RECOMMENDATIONS
-
-**Immediate Actions:**
-1. Schedule comprehensive evaluation with licensed child trauma specialist
-2. Ensure stable, predictable environment for {child_info["name"]}
-3. Implement safety planning and crisis contact protocols
-
-**Therapeutic Interventions:**
-1. Begin trauma-focused cognitive behavioral therapy (TF-CBT)
-2. Consider family therapy to strengthen support systems
-3. Monitor sleep, appetite, and behavioral patterns daily
-
-**Cultural Considerations:**
-1. Engage culturally competent mental health services
-2. Incorporate traditional coping mechanisms where appropriate
-3. Consider community-based support resources
+        Repeated saves of an unchanged report cost a dict lookup instead of a
+        full re-encode of the whole tree.
+        """
+        if self._report_dirty or self._json_cache is None:
+            if orjson is not None:
+                self._json_cache = orjson.dumps(self.report_data, default=str, option=orjson.OPT_INDENT_2)
+            else:
+                self._json_cache = json.dumps(
+                    self.report_data, indent=2, ensure_ascii=False, default=str
+                ).encode("utf-8")
+            self._report_dirty = False
+        return self._json_cache
 
-**Follow-up:**
-- Initial professional evaluation within 1-2 weeks
-- Regular monitoring and assessment as recommended by treating clinician
+    @staticmethod
+    def _parse_assessment(content):
+        """Validate structured LLM output, repairing malformed JSON once.
 
----
+        Returns a RiskAssessment, or None if the content can't be recovered,
+        so a single bad token from the model doesn't throw away the whole
+        (expensive) generation.
+        """
+        try:
+            if orjson is not None:
+                return RiskAssessment.model_validate(orjson.loads(content))
+            return RiskAssessment.model_validate_json(content)
+        except Exception as e:
+            print(f"Structured output invalid ({e}), attempting repair...")
 
-## ⚖️ IMPORTANT DISCLAIMERS
+        if json_repair is not None:
+            try:
+                return RiskAssessment.model_validate(json_repair.loads(content))
+            except Exception as e:
+                # Log which fields failed so the report prompt can be tuned
+                errors = getattr(e, "errors", None)
+                if callable(errors):
+                    for err in errors():
+                        print(f"Assessment field failed validation: {err.get('loc')} - {err.get('msg')}")
+                else:
+                    print(f"Assessment repair failed: {e}")
+        return None
 
-- **Preliminary Screening Tool:** This AI-generated assessment is for screening purposes only and does NOT constitute a clinical diagnosis
-- **Professional Validation Required:** All findings must be validated by licensed mental health professionals
-- **Emergency Protocol:** For immediate safety concerns, contact emergency services immediately
-- **Clinical Judgment:** AI analysis should supplement, not replace, professional clinical assessment
+    def _format_report(self):
+        """Format the current report_data into the Markdown report"""
+        child_info = self.report_data["child_info"]
+        assessment_data = self.report_data["assessment_data"]
+        media_attachments = self.report_data["media_attachments"]
+        severity = assessment_data["severity_score"]
+        risk_indicators = assessment_data["risk_indicators"]
+        now = datetime.now()
 
-**Report Generated:** {datetime.now().isoformat()}  
-**Next Review Recommended:** {(datetime.now()).strftime("%B %d, %Y")} (2 weeks)
-"""
+        return REPORT_TEMPLATE.format_map({
+            "now_human": now.strftime("%B %d, %Y at %H:%M"),
+            "now_date": now.strftime("%B %d, %Y"),
+            "now_iso": now.isoformat(),
+            "assessment_id": self.report_data["mobile_app_id"][:8],
+            "name": child_info["name"],
+            "age": child_info["age"],
+            "gender": child_info["gender"].title(),
+            "location": child_info["location"],
+            "parent_observations": assessment_data["parent_observations"],
+            "message_count": self._message_count,
+            "drawings_count": len(media_attachments["drawings"]),
+            "photos_count": len(media_attachments["photos"]),
+            "ai_analysis": assessment_data["ai_analysis"],
+            "risk_indicators_md": "\n".join(f"• {indicator}" for indicator in risk_indicators),
+            "severity": severity,
+            "risk_level": "🟡 Moderate Risk" if severity < 7 else "🔴 High Risk - Urgent Intervention Recommended",
+            "clinical_priority": "Standard referral appropriate" if severity < 7 else "Expedited professional evaluation needed",
+            "cultural_context": assessment_data["cultural_context"],
+        })
     
     def push_report_to_care_bridge(self, base_url="https://care-bridge-platform-7vs1.vercel.app"):
         """Push the generated report to the Care Bridge platform."""
         if not self.is_onboarded:
             return False, "Please complete the initial assessment form first."
         
-        if not self.report_data["conversation_history"]:
+        if not self._message_count:
             return False, "Please have a conversation first before pushing a report."
         
         # Prepare data in the format expected by Care Bridge API
@@ -378,7 +718,7 @@ This assessment considers the cultural and environmental factors specific to {ch
                 "location": self.report_data["child_info"]["location"]
             },
             "assessment_data": {
-                "parent_observations": self.report_data["assessment_data"]["parent_observations"],
+                "parent_observations": self.report_data["assessment_data"]["parent_observations"] or " ".join(self._observation_chunks),
                 "ai_analysis": self.report_data["assessment_data"]["ai_analysis"],
                 "severity_score": self.report_data["assessment_data"]["severity_score"],
                 "risk_indicators": self.report_data["assessment_data"]["risk_indicators"],
@@ -392,15 +732,19 @@ This assessment considers the cultural and environmental factors specific to {ch
             url = f"{base_url}/api/reports"
             headers = {"Content-Type": "application/json"}
             
-            response = requests.post(url, json=api_data, headers=headers, timeout=10)
+            if orjson is not None:
+                response = self._http.post(url, data=orjson.dumps(api_data), headers=headers, timeout=10)
+            else:
+                response = self._http.post(url, json=api_data, headers=headers, timeout=10)
             
             if response.status_code == 201:
                 result = response.json()
                 report_id = result.get('id', 'Unknown')
-                # Store the report ID for polling
+                # Stop any monitor left over from a previous submission, then
+                # store the new report ID and start monitoring
+                self._stop_response_monitor()
                 self.submitted_report_id = report_id
-                # Start polling for responses
-                self.start_response_polling()
+                self.start_response_monitor()
                 return True, f"✅ Report successfully pushed to Care Bridge Platform!\n📋 Report ID: {report_id}\n🔄 Now monitoring for specialist response..."
             else:
                 return False, f"❌ API Error: {response.status_code} - {response.text}"
@@ -414,52 +758,101 @@ This assessment considers the cultural and environmental factors specific to {ch
         except Exception as e:
             return False, f"❌ Unexpected error: {str(e)}"
     
-    def start_response_polling(self):
-        """Start polling for specialist responses in a background thread."""
+    def start_response_monitor(self):
+        """Subscribe to specialist responses via Supabase Realtime.
+
+        The insert callback fires as soon as the specialist replies, instead of
+        a background thread re-querying the table every 5 seconds. Polling is
+        kept only as a fallback when the Realtime subscription fails.
+        """
         if not self.supabase or not self.submitted_report_id:
-            print("⚠️ Cannot start polling: Missing Supabase connection or report ID")
+            print("⚠️ Cannot start monitoring: Missing Supabase connection or report ID")
             return
-        
+
         if self.polling_active:
-            print("ℹ️ Polling already active")
-            return  # Already polling
-        
+            print("ℹ️ Monitoring already active")
+            return  # Already monitoring
+
+        self._cancel = threading.Event()  # Fresh event; any old poller keeps the cancelled one
+        self._response_event.clear()
         self.polling_active = True
-        print(f"🔄 Starting background polling for report ID: {self.submitted_report_id}")
-        polling_thread = threading.Thread(target=self._poll_for_response, daemon=True)
-        polling_thread.start()
-    
+        try:
+            self._response_channel = self.supabase.channel("responses").on_postgres_changes(
+                event="INSERT",
+                schema="public",
+                table="responses",
+                filter=f"report_id=eq.{self.submitted_report_id}",
+                callback=self._on_specialist_response
+            ).subscribe()
+            # Keep the same 10-minute monitoring window the poller used
+            self._monitor_timer = threading.Timer(600, self._stop_response_monitor)
+            self._monitor_timer.daemon = True
+            self._monitor_timer.start()
+            print(f"🔔 Subscribed to specialist responses for report ID: {self.submitted_report_id}")
+        except Exception as e:
+            print(f"⚠️ Realtime subscription failed ({e}), falling back to polling")
+            self._response_channel = None
+            polling_thread = threading.Thread(target=self._poll_for_response, daemon=True)
+            polling_thread.start()
+
+    def _on_specialist_response(self, payload):
+        """Realtime callback fired when a specialist response row is inserted."""
+        record = payload.get("data", {}).get("record") if isinstance(payload, dict) else None
+        if not record:
+            return
+        print(f"📩 Specialist response received for report ID: {self.submitted_report_id}")
+        self.specialist_response = record
+        self._response_event.set()
+        self._stop_response_monitor()
+
+    def _stop_response_monitor(self):
+        """Unsubscribe from the responses channel and stop monitoring."""
+        self.polling_active = False
+        self._cancel.set()
+        if self._monitor_timer:
+            self._monitor_timer.cancel()
+            self._monitor_timer = None
+        if self._response_channel:
+            try:
+                self._response_channel.unsubscribe()
+            except Exception as e:
+                print(f"Error unsubscribing from responses channel: {e}")
+            self._response_channel = None
+
     def _poll_for_response(self):
-        """Poll Supabase for specialist responses."""
-        max_polls = 120  # Poll for 10 minutes (120 * 5 seconds)
-        poll_count = 0
+        """Poll Supabase for specialist responses with cancellable backoff.
+
+        Fallback only: the primary path holds one persistent Realtime WebSocket
+        open until the insert event fires, which is the long-poll/SSE shape
+        this poller approximates. Care Bridge itself exposes no streaming
+        endpoint, so repeated short queries are the best we can do here.
+        """
+        cancel = self._cancel  # Snapshot: a new push swaps in a fresh event
+        deadline = time.monotonic() + 600  # Same 10-minute window as before
+        delay = 5
         print("Starting polling for response...")
-        while self.polling_active and poll_count < max_polls:
+        while self.polling_active and time.monotonic() < deadline:
             try:
                 # Check for response in Supabase
                 print("Polling for response...")
-                response = self.supabase.table("responses").select("*").eq("report_id", self.submitted_report_id).execute()
-                
+                response = self.supabase.table("responses").select("*").eq("report_id", self.submitted_report_id).limit(1).execute()
+
                 if response.data and len(response.data) > 0:
                     # Response found!
                     specialist_response = response.data[0]
                     self.specialist_response = specialist_response
-                    self.get_specialist_response()
-                    self.polling_active = False
+                    self._response_event.set()
                     break
-                
-                # Wait 5 seconds before next poll
-                time.sleep(5)
-                poll_count += 1
-                
+
             except Exception as e:
                 print(f"Error polling for response: {e}")
-                time.sleep(5)
-                poll_count += 1
-        
-        # Stop polling after max attempts
-        if poll_count >= max_polls:
-            self.polling_active = False
+
+            # Wait with exponential backoff; returns immediately if cancelled
+            if cancel.wait(timeout=delay):
+                break
+            delay = min(delay * 1.5, 30)
+
+        self.polling_active = False
     
     def get_specialist_response(self):
         """Get the specialist response if available."""
@@ -474,8 +867,10 @@ This assessment considers the cultural and environmental factors specific to {ch
             }
             
             urgency_emoji = urgency_color.get(response['urgency_level'], '⚪')
-            
-            formatted_response = f"""
+
+            # Assemble in a list and join once; += in the loop below would
+            # rebuild the whole string per recommendation
+            parts = [f"""
 # 👨‍⚕️ SPECIALIST RESPONSE RECEIVED
 
 **Response Date:** {response['response_date'][:19].replace('T', ' ')}  
@@ -492,21 +887,24 @@ This assessment considers the cultural and environmental factors specific to {ch
 
 ## 💡 RECOMMENDATIONS
 
-"""
-            
+"""]
+
             if isinstance(response['recommendations'], dict):
                 for key, value in response['recommendations'].items():
-                    formatted_response += f"**{key.replace('_', ' ').title()}:** {value}\n\n"
+                    parts.append(f"**{key.replace('_', ' ').title()}:** {value}\n\n")
             else:
-                formatted_response += str(response['recommendations'])
-            
-            return True, formatted_response
+                parts.append(str(response['recommendations']))
+
+            return True, "".join(parts)
         
         return False, "No specialist response available yet. Still monitoring..."
 
 # Initialize enhanced app
 app = EnhancedTraumaAssessmentApp()
 
+# Built once: returned verbatim whenever the chat input is cleared
+_CLEARED_TEXTBOX = gr.MultimodalTextbox(value=None, interactive=True)
+
 # Enhanced CSS with onboarding styles
 css = """
 /* Main container styling */
@@ -760,15 +1158,18 @@ with gr.Blocks(css=css, title="Child Trauma Assessment - Professional Support",
             """)
             
             generate_report_btn = gr.Button(
-                "📊 Generate Comprehensive Assessment", 
-                variant="primary", 
+                "📊 Generate Comprehensive Assessment",
+                variant="primary",
                 size="lg",
                 elem_classes=["primary-button"]
             )
-            
-            # Add progress indicator
-            progress_status = gr.HTML()
-            
+
+            skip_ai_checkbox = gr.Checkbox(
+                label="Use existing notes only (faster)",
+                value=False,
+                info="Skip the AI re-analysis and format the report from notes already collected"
+            )
+
             report_output = gr.Markdown()
             
             with gr.Row():
@@ -832,14 +1233,20 @@ with gr.Blocks(css=css, title="Child Trauma Assessment - Professional Support",
     
     # Event handlers
     def handle_onboarding(name, age, gender, location):
+        # Cheap rejects first: obviously invalid submissions never touch app
+        # state or occupy the onboarding path
+        if not name or not gender or not location or age is None or not (0 < int(age) < 25):
+            return (
+                gr.Column(visible=True),   # Keep onboarding visible
+                gr.Column(visible=False),  # Keep main interface hidden
+                "",
+                '<div class="status-warning">❌ Please fill in all required information about your child.</div>'
+            )
+
         success, message = app.complete_onboarding(name, age, gender, location)
         
         if success:
-            child_display = f"""
-            <div class="child-info-display">
-                <strong>👤 Assessment for:</strong> {name}, {int(age)} years old ({gender}) • 📍 {location}
-            </div>
-            """
+            child_display = _CHILD_DISPLAY_TMPL.format(name=name, age=int(age), gender=gender, location=location)
             return (
                 gr.Column(visible=False),  # Hide onboarding
                 gr.Column(visible=True),   # Show main interface
@@ -874,8 +1281,8 @@ with gr.Blocks(css=css, title="Child Trauma Assessment - Professional Support",
             chatbot
         )
         bot_msg.then(
-            lambda: gr.MultimodalTextbox(interactive=True), 
-            None, 
+            lambda: gr.update(interactive=True),
+            None,
             [chat_input]
         )
     
@@ -883,69 +1290,86 @@ with gr.Blocks(css=css, title="Child Trauma Assessment - Professional Support",
     
     # Clear conversation
     def clear_conversation():
-        app.report_data["conversation_history"] = []
+        app._message_count = 0
+        app._observation_chunks = []
         app.report_data["assessment_data"]["parent_observations"] = ""
         app.report_data["assessment_data"]["ai_analysis"] = ""
-        app.report_data["media_attachments"] = {"drawings": [], "audio_recordings": [], "photos": []}
-        return [], gr.MultimodalTextbox(value=None, interactive=True)
+        app.report_data["media_attachments"] = _fresh_copy(_FRESH_MEDIA)
+        app._report_dirty = True
+        return [], _CLEARED_TEXTBOX
     
     clear_btn.click(
         clear_conversation,
         outputs=[chatbot, chat_input]
     )
     
-    # Generate report with progress updates
-    def generate_report_with_progress():
-        # Show initial progress
-        progress_updates = []
-        
-        def update_progress(message):
-            progress_updates.append(f'<div class="status-info">{message}</div>')
-            return progress_updates[-1]
-        
-        # Generate report with progress callback
-        try:
-            progress = update_progress("🚀 Starting assessment generation...")
-            yield "", progress  # Empty report, show progress
-            
-            report = app.generate_comprehensive_report(progress_callback=update_progress)
-            
-            final_progress = update_progress("✅ Assessment completed!")
-            yield report, final_progress
-            
-            # Clear progress after 3 seconds
-            time.sleep(3)
-            yield report, ""
-            
-        except Exception as e:
-            error_progress = f'<div class="status-warning">❌ Error: {str(e)}</div>'
-            yield "", error_progress
-
+    # Generate report; gr.Progress surfaces stage updates natively, so no
+    # separate HTML status component or wrapper generator is needed
     generate_report_btn.click(
-        generate_report_with_progress,
-        outputs=[report_output, progress_status]
+        app.generate_comprehensive_report,
+        inputs=[skip_ai_checkbox],
+        outputs=[report_output]
     )
     
-    # Save report
-    def save_report_with_data(report_content):
+    # Save report: always write to a temp file in the same directory, fsync,
+    # then rename into place so a killed worker never leaves a half-written
+    # report behind (os.replace is atomic on the same filesystem)
+    def _write_report_file(report_filename, report_content):
+        tmp = report_filename + ".tmp"
+        with open(tmp, 'w', encoding='utf-8', buffering=_SAVE_BUFFER_SIZE) as f:
+            f.write(report_content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, report_filename)
+
+    def _save_sync(report_content, report_filename, data_filename, serialized_data):
+        _write_report_file(report_filename, report_content)
+        tmp = data_filename + ".tmp"
+        with open(tmp, 'wb', buffering=_SAVE_BUFFER_SIZE) as f:
+            f.write(serialized_data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, data_filename)
+
+    def _save_streaming_sync(report_content, report_filename, data_filename, report_data):
+        _write_report_file(report_filename, report_content)
+        # json.dump's many small writes are absorbed by the large buffer, and
+        # the serialized blob never exists in memory all at once
+        tmp = data_filename + ".tmp"
+        with open(tmp, 'w', encoding='utf-8', buffering=_STREAM_BUFFER_SIZE) as f:
+            json.dump(report_data, f, indent=2, ensure_ascii=False, default=str)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, data_filename)
+
+    async def save_report_with_data(report_content):
         if not report_content or "Please complete" in report_content:
             return "❌ No report available to save."
-        
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
+
+        # Direct integer formatting; strftime re-parses its format string and
+        # consults locale data on every call
+        dt = datetime.now()
+        timestamp = f"{dt.year:04d}{dt.month:02d}{dt.day:02d}_{dt.hour:02d}{dt.minute:02d}{dt.second:02d}"
+
         # Save markdown report
         report_filename = f"trauma_report_{app.report_data['child_info']['name']}_{timestamp}.md"
-        
+
         # Save structured data
         data_filename = f"assessment_data_{app.report_data['child_info']['name']}_{timestamp}.json"
-        
+
         try:
-            with open(report_filename, 'w', encoding='utf-8') as f:
-                f.write(report_content)
-            
-            with open(data_filename, 'w', encoding='utf-8') as f:
-                json.dump(app.report_data, f, indent=2, ensure_ascii=False, default=str)
-            
+            n_items = (
+                sum(len(v) for v in app.report_data["media_attachments"].values())
+                + len(app._observation_chunks)
+            )
+            if n_items > _STREAM_SAVE_THRESHOLD:
+                # Huge report: stream it rather than double peak memory
+                await asyncio.to_thread(_save_streaming_sync, report_content, report_filename, data_filename, app.report_data)
+            else:
+                # Snapshot the serialized bytes before leaving the event loop so
+                # a concurrent add_message can't mutate what gets written
+                serialized = app._serialize_report_data()
+                await asyncio.to_thread(_save_sync, report_content, report_filename, data_filename, serialized)
             return f"✅ Report saved as: **{report_filename}**<br>📊 Data saved as: **{data_filename}**"
         except Exception as e:
             return f"❌ Error saving files: {str(e)}"
@@ -968,11 +1392,17 @@ with gr.Blocks(css=css, title="Child Trauma Assessment - Professional Support",
     )
     
     # Check for specialist response
-    def check_for_response():
+    async def check_for_response():
         has_response, response_content = app.get_specialist_response()
         if has_response:
             return response_content, '<div class="status-success">✅ Specialist response received!</div>'
         elif app.polling_active:
+            # Wait on the arrival event for a few seconds instead of bouncing
+            # the user straight back to re-click; to_thread keeps the worker free
+            if await asyncio.to_thread(app._response_event.wait, 10):
+                has_response, response_content = app.get_specialist_response()
+                if has_response:
+                    return response_content, '<div class="status-success">✅ Specialist response received!</div>'
             return "", '<div class="status-info">🔄 Still monitoring for specialist response...</div>'
         elif app.submitted_report_id:
             return "", '<div class="status-warning">⏸️ Monitoring stopped. No response received within time limit.</div>'
@@ -990,15 +1420,29 @@ with gr.Blocks(css=css, title="Child Trauma Assessment - Professional Support",
     # Feedback handling
     def handle_feedback(x: gr.LikeData):
         feedback_type = "👍 Helpful" if x.liked else "👎 Needs Improvement"
-        print(f"User feedback: {feedback_type} on message {x.index}")
+        app._feedback_buffer.append(f"User feedback: {feedback_type} on message {x.index}")
+        # Flush in batches so bursty clicking doesn't spam stdout syscalls
+        now = time.monotonic()
+        if len(app._feedback_buffer) >= 50 or now - app._feedback_last_flush >= 5:
+            sys.stdout.write("\n".join(app._feedback_buffer) + "\n")
+            app._feedback_buffer.clear()
+            app._feedback_last_flush = now
         # Could store this in report_data for quality improvement
     
     chatbot.like(handle_feedback, None, None, like_user_message=True)
 
-# Launch configuration
+# Launch configuration: a share tunnel relays every request through a remote
+# server (50-200 ms extra per interaction), so it's opt-in via GRADIO_SHARE=1
 if __name__ == "__main__":
+    SHARE = os.getenv("GRADIO_SHARE", "0") == "1"
+    # Gradio-side batch=True is off the table while bot_response streams
+    # (batched handlers can't be generators); concurrent users are instead
+    # batched inside the inference server (OLLAMA_NUM_PARALLEL or
+    # llama-server --cont-batching), with the queue absorbing bursts here
+    demo.queue(default_concurrency_limit=8, max_size=64)
     demo.launch(
-        share=True,
-        inbrowser=True,
-        show_error=True
+        share=SHARE,
+        inbrowser=False,
+        show_error=True,
+        server_name="0.0.0.0"
     )
\ No newline at end of file